@@ -1,11 +1,32 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import gspread
 from google.oauth2.service_account import Credentials
 from datetime import datetime, date, timedelta
 import json
+import re
+import threading
 from zoneinfo import ZoneInfo
 
+try:
+    import orjson
+except ImportError:  # opcional: sin orjson seguimos con json
+    orjson = None
+
+
+def json_dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def json_loads(s):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+
 ARG_TZ = ZoneInfo("America/Argentina/Buenos_Aires")
 
 def now_ar():
@@ -46,11 +67,19 @@ def get_worksheets():
     logs_ws = sheet.worksheet("logs")
     daily_ws = sheet.worksheet("daily_status")
     
-    ensure_headers(foods_ws, FOODS_COLS)
-    ensure_headers(logs_ws, LOGS_COLS)
-    ensure_headers(daily_ws, DAILY_COLS)
-    
-    return foods_ws, logs_ws, daily_ws
+    # solo la fila 1 de las tres hojas, en un único batchGet
+    resp = sheet.values_batch_get(["foods!1:1", "logs!1:1", "daily_status!1:1"])
+    rows = [(vr.get("values") or [[]])[0] for vr in resp.get("valueRanges", [])]
+    foods_h, logs_h, daily_h = (rows + [[], [], []])[:3]
+
+    # headers vigentes por hoja (para ubicar columnas sin releer la hoja)
+    headers = {
+        "foods": ensure_headers(foods_ws, FOODS_COLS, foods_h),
+        "logs": ensure_headers(logs_ws, LOGS_COLS, logs_h),
+        "daily_status": ensure_headers(daily_ws, DAILY_COLS, daily_h),
+    }
+
+    return foods_ws, logs_ws, daily_ws, headers
 
 
 # ==================================================
@@ -68,6 +97,40 @@ def parse_number(x) -> float:
     return float(s)
 
 
+# "." y "," en el mismo valor (en cualquier orden)
+BOTH_SEPARATORS_RE = re.compile(r"\..*,|,.*\.")
+
+
+def parse_number_col(s: pd.Series) -> np.ndarray:
+    """
+    Misma regla que parse_number pero vectorizada sobre la columna entera
+    (operaciones .str de pandas, sin llamar a Python por celda).
+    Celdas vacías o inválidas -> 0.0.
+    Camino rápido: si la columna ya es numérica "limpia" (lo que escribe la app
+    con RAW), pd.to_numeric alcanza y no hace falta tocar los strings.
+    """
+    try:
+        # to_numeric no falla con "" (da NaN): las vacías también van a 0.0
+        return np.nan_to_num(pd.to_numeric(s).to_numpy(dtype=np.float64), nan=0.0)
+    except (ValueError, TypeError):
+        pass
+
+    s = s.astype(str).str.replace("\u00a0", " ", regex=False).str.strip()
+    # "1.234,5": con ambos separadores el punto es de miles
+    both = s.str.contains(BOTH_SEPARATORS_RE)
+    s = s.mask(both, s.str.replace(".", "", regex=False))
+    s = s.str.replace(",", ".", regex=False)
+    return pd.to_numeric(s, errors="coerce").fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def parse_int_col(s: pd.Series) -> np.ndarray:
+    """
+    Versión vectorizada de safe_int para una columna (int32: ids y kcal enteras).
+    """
+    vals = np.nan_to_num(parse_number_col(s), nan=0.0, posinf=0.0, neginf=0.0)
+    return np.rint(vals).astype(np.int32)
+
+
 def safe_int(x) -> int:
     s = str(x).strip().lower()
     if s == "" or s in ("none", "nan"):
@@ -87,17 +150,21 @@ def safe_bool(x) -> bool:
 # ==================================================
 # HELPERS SHEETS
 # ==================================================
-def ensure_headers(ws, required_cols):
+def ensure_headers(ws, required_cols, current=None):
     """
     Asegura que la primera fila (headers) contenga required_cols.
     Si falta alguna, la agrega al final.
+    current: fila 1 ya leída (si no, se pide solo esa fila).
     """
-    values = ws.get_all_values()
-    if not values:
+    if current is None:
+        current = ws.row_values(1)
+    # fila 1 vacía: solo agregamos al final si la hoja entera está vacía
+    # (si hay datos debajo, el header se escribe en la fila 1 más abajo)
+    if not current and not ws.get_all_values():
         ws.append_row(required_cols, value_input_option="RAW")
         return required_cols
 
-    header = [h.strip() for h in values[0]]
+    header = [h.strip() for h in current]
     missing = [c for c in required_cols if c not in header]
     if missing:
         new_header = header + missing
@@ -106,6 +173,33 @@ def ensure_headers(ws, required_cols):
     return header
 
 
+def values_to_df(values, required_cols) -> pd.DataFrame | None:
+    """
+    Arma el DataFrame directo desde la matriz cruda de la hoja
+    (primera fila = headers) y completa required_cols faltantes con "".
+    Devuelve None si la hoja no tiene filas de datos.
+    """
+    if not values or len(values) < 2:
+        return None
+
+    header = [h.strip() for h in values[0]]
+    df = pd.DataFrame(values[1:], columns=header)
+
+    for col in required_cols:
+        if col not in df.columns:
+            df[col] = ""
+    return df
+
+
+def appended_row(resp: dict) -> int:
+    """
+    Fila (1-indexed) donde quedó un append_row, tomada del rango escrito que
+    devuelve la API (ej: "logs!A12:H12" -> 12).
+    """
+    updated = resp["updates"]["updatedRange"].split("!")[-1].split(":")[0]
+    return gspread.utils.a1_to_rowcol(updated)[0]
+
+
 def find_row_index_by_id(ws, target_id: int) -> int | None:
     """
     Devuelve el número de fila (1-indexed) en la hoja, incluyendo header.
@@ -129,58 +223,149 @@ def find_row_index_by_id(ws, target_id: int) -> int | None:
 # ==================================================
 FOODS_COLS = ["id", "alimento", "tipo", "valor_kcal", "valor_proteina"]
 
+# derivadas al cargar: kcal / proteína por unidad de cantidad (g o unidad)
+FOODS_UNIT_COLS = ["kcal_unit", "prot_unit"]
+
 # logs: agregamos columnas para edición real
 LOGS_COLS = ["id", "fecha", "timestamp", "meal", "total_kcal", "detalle", "kcal_libres", "detalle_json"]
 
 DAILY_COLS = ["fecha", "gym", "meta"]
 
-foods_ws, logs_ws, daily_ws = get_worksheets()
+# vacíos para hojas sin datos (st.cache_data devuelve copias, no se mutan)
+EMPTY_FOODS = pd.DataFrame(columns=FOODS_COLS + FOODS_UNIT_COLS)
+EMPTY_LOGS = pd.DataFrame(columns=LOGS_COLS)
+EMPTY_DAILY = pd.DataFrame(columns=DAILY_COLS)
+
+foods_ws, logs_ws, daily_ws, sheet_headers = get_worksheets()
+
+
+def col_letters(header) -> dict:
+    """Letra de columna A1 por nombre de header."""
+    return {name: gspread.utils.rowcol_to_a1(1, i + 1)[:-1] for i, name in enumerate(header)}
+
+
+def row_range(letters: dict, row: int, first: str, last: str) -> str:
+    """Rango A1 de una fila entre dos columnas con nombre (ej. B5:H5)."""
+    return f"{letters[first]}{row}:{letters[last]}{row}"
+
+
+# letras por hoja, calculadas una vez por rerun desde los headers cacheados
+sheet_cols = {name: col_letters(header) for name, header in sheet_headers.items()}
 
 
 # ==================================================
 # CARGA CACHEADA
 # ==================================================
-@st.cache_data
-def load_foods_df() -> pd.DataFrame:
-    values = foods_ws.get_all_values()
-    if not values or len(values) < 2:
-        return pd.DataFrame(columns=FOODS_COLS)
+@st.cache_resource
+def sheet_values_store() -> dict:
+    """
+    Valores crudos por hoja, compartidos entre sesiones. Se invalida por hoja
+    (clear_sheet_values), así escribir en una no obliga a rebajar las otras.
+    """
+    return {}
 
-    header = [h.strip() for h in values[0]]
-    rows = values[1:]
-    df = pd.DataFrame(rows, columns=header)
 
-    for col in FOODS_COLS:
-        if col not in df.columns:
-            df[col] = ""
+def load_sheet_values(name: str) -> list:
+    """
+    Valores crudos de una hoja. Las que falten en el store (en frío, las tres)
+    se piden juntas en un solo values.batchGet.
+    """
+    store = sheet_values_store()
+    values = store.get(name)
+    if values is None:
+        sheets = {"foods": foods_ws, "logs": logs_ws, "daily_status": daily_ws}
+        missing = [n for n in sheets if n not in store]
+        resp = foods_ws.spreadsheet.values_batch_get([f"'{sheets[n].title}'" for n in missing])
+        ranges = resp.get("valueRanges", [])
+        if len(ranges) != len(missing):
+            raise RuntimeError(f"batchGet devolvió {len(ranges)} rangos, se pidieron {len(missing)}")
+
+        for n, value_range in zip(missing, ranges):
+            # batchGet recorta las celdas vacías al final; rellenamos como get_all_values
+            raw = value_range.get("values", [])
+            fetched = gspread.utils.fill_gaps(raw) if raw else []
+            store[n] = fetched
+            if n == name:
+                # lo recién bajado, aunque otra sesión invalide el store mientras tanto
+                values = fetched
+    return values
+
+
+def clear_sheet_values(name: str):
+    sheet_values_store().pop(name, None)
+
+
+@st.cache_resource
+def sheet_values_lock():
+    """Lock de proceso para el store (reentrante: guardar un log lo toma entero)."""
+    return threading.RLock()
+
+
+def patch_sheet_row(name: str, sheet_row: int, values: list, start: int = 0):
+    """
+    Refleja en el store la fila recién escrita en la hoja (values desde la
+    columna start, 0-indexed), así ninguna sesión necesita rebajarla.
+    Si la hoja no está en el store o la fila no encaja, se invalida.
+    """
+    with sheet_values_lock():
+        store = sheet_values_store()
+        current = store.get(name)
+        pos = sheet_row - 1
+        width = len(current[0]) if current else 0
+        if not current or not 1 <= pos <= len(current) or start + len(values) > width:
+            store.pop(name, None)
+            return
+
+        row = list(current[pos]) if pos < len(current) else [""] * width
+        row[start:start + len(values)] = [str(v) for v in values]
+        # lista nueva: quien esté leyendo la anterior no la ve cambiar
+        store[name] = current[:pos] + [row] + current[pos + 1:]
+
 
-    df["id"] = df["id"].apply(safe_int)
+@st.cache_data
+def load_foods_df() -> pd.DataFrame:
+    df = values_to_df(load_sheet_values("foods"), FOODS_COLS)
+    if df is None:
+        return prepare_foods_df(EMPTY_FOODS.copy())
+
+    df["id"] = parse_int_col(df["id"])
     df["alimento"] = df["alimento"].astype(str).str.lower().str.strip()
     df["tipo"] = df["tipo"].astype(str).str.lower().str.strip()
-    df["valor_kcal"] = df["valor_kcal"].apply(parse_number)
-    df["valor_proteina"] = df["valor_proteina"].apply(parse_number)
-    df = df[df["alimento"] != ""].copy()
-    return df
+    df["valor_kcal"] = parse_number_col(df["valor_kcal"])
+    df["valor_proteina"] = parse_number_col(df["valor_proteina"])
+    # sin .copy(): prepare_foods_df ordena primero y trabaja sobre ese resultado
+    return prepare_foods_df(df[df["alimento"] != ""])
 
 
-@st.cache_data
-def load_logs_df() -> pd.DataFrame:
-    values = logs_ws.get_all_values()
-    if not values or len(values) < 2:
-        return pd.DataFrame(columns=LOGS_COLS)
+def prepare_foods_df(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deja foods listo para usar:
+      - ordenado por alimento (orden estable: entre repetidos queda primero el de
+        la fila más arriba) y alimento como category, así las categorías ya son
+        la lista ordenada para el selectbox
+      - kcal_unit / prot_unit: "100g" -> valor por gramo; "unidad" -> por unidad
+    El índice sigue siendo la posición en la hoja (fila de hoja = índice + 2).
+    """
+    df = df.sort_values("alimento", kind="stable")
+    df["alimento"] = df["alimento"].astype(str).astype("category")
 
-    header = [h.strip() for h in values[0]]
-    rows = values[1:]
-    df = pd.DataFrame(rows, columns=header)
+    divisor = np.where(df["tipo"].to_numpy() == "100g", 100.0, 1.0)
+    df["kcal_unit"] = df["valor_kcal"].to_numpy(dtype=np.float64) / divisor
+    df["prot_unit"] = df["valor_proteina"].to_numpy(dtype=np.float64) / divisor
+    return df
 
-    for col in LOGS_COLS:
-        if col not in df.columns:
-            df[col] = ""
 
-    df["id"] = df["id"].apply(safe_int)
-    df["meal"] = df["meal"].astype(str).str.lower().str.strip()
-    df["total_kcal"] = df["total_kcal"].apply(parse_number)
-    df["kcal_libres"] = df["kcal_libres"].apply(safe_int)
+@st.cache_data
+def load_logs_df() -> pd.DataFrame:
+    df = values_to_df(load_sheet_values("logs"), LOGS_COLS)
+    if df is None:
+        return EMPTY_LOGS
+
+    df["id"] = parse_int_col(df["id"])
+    df["meal"] = df["meal"].astype(str).str.lower().str.strip().astype("category")
+    # float32 alcanza: solo se suma y se muestra redondeado
+    df["total_kcal"] = parse_number_col(df["total_kcal"]).astype(np.float32)
+    df["kcal_libres"] = parse_int_col(df["kcal_libres"])
     df["fecha"] = df["fecha"].astype(str).str.strip()
     df["timestamp"] = df["timestamp"].astype(str).str.strip()
     df["detalle"] = df["detalle"].astype(str)
@@ -188,19 +373,73 @@ def load_logs_df() -> pd.DataFrame:
     return df
 
 
-@st.cache_data
-def load_daily_status_df() -> pd.DataFrame:
-    values = daily_ws.get_all_values()
-    if not values or len(values) < 2:
-        return pd.DataFrame(columns=DAILY_COLS)
+def clear_logs_frames():
+    """
+    Invalida lo derivado de los valores crudos de logs (DataFrame + mapas).
+    """
+    load_logs_df.clear()
+    build_log_rows.clear()
+    load_logs_fecha_rows.clear()
 
-    header = [h.strip() for h in values[0]]
-    rows = values[1:]
-    df = pd.DataFrame(rows, columns=header)
 
-    for col in DAILY_COLS:
-        if col not in df.columns:
-            df[col] = ""
+def clear_logs_cache():
+    """
+    Invalida logs después de escribir en la hoja (valores crudos + derivados).
+    """
+    clear_sheet_values("logs")
+    clear_logs_frames()
+
+
+@st.cache_data(show_spinner=False)
+def build_log_rows(df: pd.DataFrame) -> dict:
+    """
+    id -> fila de hoja (1-indexed). El índice de logs es la posición en la
+    hoja sin header, así que fila = índice + 2. Ante ids repetidos, el primero.
+    """
+    first = df.drop_duplicates("id")
+    return {int(log_id): int(idx) + 2 for log_id, idx in zip(first["id"], first.index)}
+
+
+@st.cache_data(show_spinner=False)
+def load_logs_fecha_rows() -> dict:
+    """
+    fecha -> posiciones (iloc) en load_logs_df(). Se arma una vez por carga
+    (sin argumentos: no hay que hashear el DataFrame en cada render).
+    """
+    return load_logs_df().groupby("fecha", sort=False).indices
+
+
+def rows_for_fecha(df: pd.DataFrame, fecha_rows: dict, fecha_str: str) -> pd.DataFrame:
+    """Filas de un día: un get en el dict en vez de comparar toda la columna."""
+    pos = fecha_rows.get(fecha_str)
+    return df.iloc[pos] if pos is not None else df.iloc[:0]
+
+
+def find_log_row(target_id: int) -> int | None:
+    """
+    Fila del log target_id sin bajar la hoja: sale del mapa cacheado y se
+    confirma leyendo una sola celda. Si la hoja cambió, escaneo completo.
+    """
+    row = build_log_rows(load_logs_df()).get(int(target_id))
+    if row is not None:
+        id_col = sheet_headers["logs"].index("id") + 1
+        if safe_int(logs_ws.cell(row, id_col).value) == int(target_id):
+            return row
+    return find_row_index_by_id(logs_ws, target_id)
+
+
+def clear_daily_cache():
+    """Invalida daily_status después de escribir (valores crudos + DataFrame)."""
+    clear_sheet_values("daily_status")
+    load_daily_status_df.clear()
+    load_daily_fecha_rows.clear()
+
+
+@st.cache_data
+def load_daily_status_df() -> pd.DataFrame:
+    df = values_to_df(load_sheet_values("daily_status"), DAILY_COLS)
+    if df is None:
+        return EMPTY_DAILY
 
     df["fecha"] = df["fecha"].astype(str).str.strip()
     # compatibilidad con columnas viejas
@@ -208,11 +447,87 @@ def load_daily_status_df() -> pd.DataFrame:
         df["tipo_dia"] = ""
     
     df["tipo_dia"] = df["tipo_dia"].astype(str).str.strip().str.lower()
-    df["meta"] = df["meta"].apply(safe_int)
+    df["meta"] = parse_int_col(df["meta"])
     return df
 
 
-foods = load_foods_df()
+@st.cache_data(show_spinner=False)
+def load_daily_fecha_rows() -> dict:
+    """fecha -> posiciones (iloc) en load_daily_status_df(), una vez por carga."""
+    return load_daily_status_df().groupby("fecha", sort=False).indices
+
+
+def build_food_index(df: pd.DataFrame) -> dict:
+    """
+    Índice alimento -> {tipo, valor_kcal, valor_proteina, kcal_unit, prot_unit}
+    para lookups O(1). Si hay alimentos repetidos gana el primero
+    (igual que el filtro por máscara).
+    """
+    cols = ["tipo", "valor_kcal", "valor_proteina"] + FOODS_UNIT_COLS
+    return (
+        df.drop_duplicates("alimento")
+        .set_index("alimento")[cols]
+        .to_dict("index")
+    )
+
+
+@st.cache_data(show_spinner=False)
+def build_food_rows(df: pd.DataFrame) -> dict:
+    """
+    alimento -> etiqueta de fila en foods (primera aparición).
+    La etiqueta es la posición en la hoja sin header: fila de hoja = etiqueta + 2.
+    """
+    first = df.drop_duplicates("alimento")
+    return dict(zip(first["alimento"], first.index))
+
+
+def build_food_arrays(df: pd.DataFrame) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+    """
+    (categorías de alimento, kcal_unit, prot_unit) como arrays contiguos
+    alineados por código de categoría: foods viene ordenado por alimento, así
+    que la primera fila de cada nombre cae en la misma posición que su categoría.
+    """
+    first = df.drop_duplicates("alimento")
+    return (
+        df["alimento"].cat.categories,
+        first["kcal_unit"].to_numpy(dtype=np.float64),
+        first["prot_unit"].to_numpy(dtype=np.float64),
+    )
+
+
+def build_food_options(df: pd.DataFrame) -> list[str]:
+    """
+    Opciones del selectbox de alimentos: "" + nombres ordenados
+    (las categorías de foods["alimento"] ya vienen ordenadas y sin repetidos).
+    """
+    return [""] + df["alimento"].cat.categories.tolist()
+
+
+@st.cache_data(show_spinner=False)
+def build_food_lookups(df: pd.DataFrame) -> tuple:
+    """
+    Todo lo que Calcular deriva de foods, en un solo cache: así cada rerun
+    hashea foods una vez y no una por estructura.
+    Devuelve (food_index, (categorías, kcal_unit, prot_unit), opciones).
+    """
+    return build_food_index(df), build_food_arrays(df), build_food_options(df)
+
+
+def clear_foods_frames():
+    """
+    Invalida lo derivado de los valores crudos de foods (DataFrame + lookups).
+    """
+    load_foods_df.clear()
+    build_food_lookups.clear()
+    build_food_rows.clear()
+
+
+def clear_food_caches():
+    """
+    Invalida foods después de escribir en la hoja (valores crudos + derivados).
+    """
+    clear_sheet_values("foods")
+    clear_foods_frames()
 
 
 # ==================================================
@@ -233,84 +548,70 @@ def calc_items_dual(rows_data, kcal_libres: int, prot_libres: int, calc_mode: st
     detail_lines = []
     items = []
 
-    for alimento, val in rows_data:
-        if not alimento or val <= 0:
-            continue
-
-        row = foods[foods["alimento"] == alimento]
-        if row.empty:
-            continue
-
-        food = row.iloc[0]
-        valor_kcal = float(food["valor_kcal"])
-        tipo = str(food["tipo"]).strip().lower()
-
-        if calc_mode == "qty":
-            cantidad = int(val)
-            if tipo == "100g":
-                kcal_actual = (cantidad / 100.0) * valor_kcal
-            else:
-                kcal_actual = cantidad * valor_kcal
-
-            valor_prot = float(food.get("valor_proteina", 0) or 0)
+    if calc_mode == "qty":
+        valid = [
+            (alimento, int(val))
+            for alimento, val in rows_data
+            if alimento and val > 0 and alimento in food_index
+        ]
+        if valid:
+            # total y proteína en un solo producto punto (kcal/prot por unidad precalculadas)
+            qtys = np.array([c for _, c in valid], dtype=np.float64)
+            codes = food_cats.get_indexer([a for a, _ in valid])
+            kcal_unit = food_kcal_unit[codes]
+            prot_unit = food_prot_unit[codes]
+
+            total = float(qtys @ kcal_unit)
+            total_prot = float(qtys @ prot_unit)
+            kcal_items = (qtys * kcal_unit).tolist()
+            prot_items = (qtys * prot_unit).tolist()
+
+            for (alimento, cantidad), kcal_actual, prot in zip(valid, kcal_items, prot_items):
+                food = food_index[alimento]
+                detail_lines.append(
+                    f"{alimento}: {cantidad} ({round(kcal_actual)} kcal | {round(prot)}g prot)"
+                )
+                items.append(
+                    {
+                        "alimento": alimento,
+                        "cantidad": int(cantidad),
+                        "kcal_target": None,
+                        "kcal_actual": float(kcal_actual),
+                        "tipo": food["tipo"],
+                        "valor_kcal": float(food["valor_kcal"]),
+                    }
+                )
+    else:  # calc_mode == "kcal"
+        for alimento, val in rows_data:
+            if not alimento or val <= 0:
+                continue
 
-            if tipo == "100g":
-                prot = (cantidad / 100.0) * valor_prot
-            else:
-                prot = cantidad * valor_prot
-            
-            total_prot += prot
-            
-            total += kcal_actual
-            detail_lines.append(
-                f"{alimento}: {cantidad} ({round(kcal_actual)} kcal | {round(prot)}g prot)"
-            )
-            items.append(
-                {
-                    "alimento": alimento,
-                    "cantidad": int(cantidad),
-                    "kcal_target": None,
-                    "kcal_actual": float(kcal_actual),
-                    "tipo": tipo,
-                    "valor_kcal": valor_kcal,
-                }
-            )
+            food = food_index.get(alimento)
+            if food is None:
+                continue
 
-        else:  # calc_mode == "kcal"
+            valor_kcal = float(food["valor_kcal"])
+            kcal_unit = float(food["kcal_unit"])
+            tipo = food["tipo"]
             kcal_target = int(val)
 
-            # invertimos para cantidad
-            if valor_kcal <= 0:
+            # invertimos para cantidad (kcal_unit ya viene por gramo o por unidad)
+            if kcal_unit <= 0:
                 continue
 
-            if tipo == "100g":
-                cantidad = int(round((kcal_target / valor_kcal) * 100.0))
-                if cantidad < 1:
-                    cantidad = 1
-                kcal_actual = (cantidad / 100.0) * valor_kcal
-                unidad_txt = "g"
-            else:
-                cantidad = int(round(kcal_target / valor_kcal))
-                if cantidad < 1:
-                    cantidad = 1
-                kcal_actual = cantidad * valor_kcal
-                unidad_txt = "u"
+            cantidad = max(1, int(round(kcal_target / kcal_unit)))
+            kcal_actual = cantidad * kcal_unit
+            unidad_txt = "g" if tipo == "100g" else "u"
 
-            valor_prot = float(food.get("valor_proteina", 0) or 0)
-
-            if tipo == "100g":
-                prot = (cantidad / 100.0) * valor_prot
-            else:
-                prot = cantidad * valor_prot
-        
+            prot = cantidad * float(food["prot_unit"])
             total_prot += prot
-            
+
             # total es el objetivo (como pediste)
             total += float(kcal_target)
 
             detail_lines.append(
-                    f"{alimento}: {kcal_target} kcal → {cantidad}{unidad_txt} ({round(prot)}g prot)"
-                )
+                f"{alimento}: {kcal_target} kcal → {cantidad}{unidad_txt} ({round(prot)}g prot)"
+            )
             items.append(
                 {
                     "alimento": alimento,
@@ -349,14 +650,13 @@ def calc_items_dual(rows_data, kcal_libres: int, prot_libres: int, calc_mode: st
 # DAILY STATUS (GYM/META POR DÍA)
 # ==================================================
 def get_or_create_daily_status(fecha_str: str):
-    df = load_daily_status_df()
-    row = df[df["fecha"] == fecha_str]
+    row = rows_for_fecha(load_daily_status_df(), load_daily_fecha_rows(), fecha_str)
 
     if row.empty:
         tipo = "normal"
         meta = META_NORMAL
         daily_ws.append_row([fecha_str, tipo, str(meta)], value_input_option="RAW")
-        load_daily_status_df.clear()
+        clear_daily_cache()
         return tipo, meta
 
     tipo = str(row.iloc[0].get("tipo_dia", "normal")).strip().lower()
@@ -380,13 +680,8 @@ def upsert_daily_status(fecha_str: str, tipo: str):
     else:
         meta = META_ENTRENO
 
-    values = daily_ws.get_all_values()
-
-    if not values:
-        daily_ws.append_row(["fecha", "tipo_dia", "meta"], value_input_option="RAW")
-        values = daily_ws.get_all_values()
-
-    header = [h.strip() for h in values[0]]
+    # header cacheado al conectar (ensure_headers ya garantizó la fila 1)
+    header = sheet_headers["daily_status"]
 
     # columnas
     fecha_col = header.index("fecha")
@@ -394,16 +689,22 @@ def upsert_daily_status(fecha_str: str, tipo: str):
         # agregamos la columna si no existe
         header.append("tipo_dia")
         daily_ws.update("1:1", [header], value_input_option="RAW")
-        tipo_col = header.index("tipo_dia")
-    else:
-        tipo_col = header.index("tipo_dia")
-    meta_col = header.index("meta")
+        sheet_cols["daily_status"] = col_letters(header)
 
+    # fila por fecha desde el cache (índice + 2), confirmada con una celda
     target_row = None
-    for idx, row in enumerate(values[1:], start=2):
-        if fecha_col < len(row) and str(row[fecha_col]).strip() == fecha_str:
-            target_row = idx
-            break
+    hit = rows_for_fecha(load_daily_status_df(), load_daily_fecha_rows(), fecha_str).index
+    if len(hit):
+        candidate = int(hit[0]) + 2
+        if str(daily_ws.cell(candidate, fecha_col + 1).value or "").strip() == fecha_str:
+            target_row = candidate
+
+    if target_row is None:
+        # la hoja cambió (o la fecha no está): leemos solo la columna fecha
+        for idx, v in enumerate(daily_ws.col_values(fecha_col + 1)[1:], start=2):
+            if str(v).strip() == fecha_str:
+                target_row = idx
+                break
 
     if target_row is None:
         daily_ws.append_row(
@@ -411,21 +712,39 @@ def upsert_daily_status(fecha_str: str, tipo: str):
             value_input_option="RAW"
         )
     else:
-        rng = f"{gspread.utils.rowcol_to_a1(target_row, tipo_col+1)}:{gspread.utils.rowcol_to_a1(target_row, meta_col+1)}"
+        rng = row_range(sheet_cols["daily_status"], target_row, "tipo_dia", "meta")
         daily_ws.update(
             rng,
             [[tipo, str(meta)]],
             value_input_option="RAW"
         )
 
-    load_daily_status_df.clear()
+    clear_daily_cache()
+
+
+def next_log_id() -> int:
+    """
+    Próximo id para logs: max(id) + 1 sobre el logs compartido, que cada
+    escritura actualiza o invalida (sin request extra). Llamar con
+    sheet_values_lock() tomado hasta parchear la fila, así dos sesiones no
+    sacan el mismo id.
+    """
+    logs_cached = load_logs_df()
+    return int(logs_cached["id"].max()) + 1 if not logs_cached.empty else 1
+
+
+def blank_calc_rows(n: int = 4) -> pd.DataFrame:
+    """
+    Filas vacías para el editor de Calcular.
+    """
+    return pd.DataFrame({"alimento": [""] * n, "cantidad": [0] * n})
 
 
 # ==================================================
 # UI STATE
 # ==================================================
-if "rows_count" not in st.session_state:
-    st.session_state.rows_count = 4
+if "calc_rows" not in st.session_state:
+    st.session_state.calc_rows = blank_calc_rows()
 
 if "form_reset_id" not in st.session_state:
     st.session_state.form_reset_id = 0
@@ -480,7 +799,7 @@ with col_reset:
         st.session_state.prefill_items = None
         st.session_state.edit_log_id = None
 
-        st.session_state.rows_count = 4
+        st.session_state.calc_rows = blank_calc_rows()
 
         st.session_state.form_reset_id = st.session_state.get("form_reset_id", 0) + 1
         st.session_state.food_form_reset_id = st.session_state.get("food_form_reset_id", 0) + 1
@@ -489,210 +808,220 @@ with col_reset:
 
 
 # ==================================================
-# CALCULAR
+# RESULTADO + GUARDAR (fragment)
 # ==================================================
-if mode == "Calcular":
-    calc_mode = "qty"
-
-    # meal (si venimos de editar, puede estar precargada)
-    default_meal = st.session_state.get("prefill_meal", MEALS[0])
-    if default_meal not in MEALS:
-        default_meal = MEALS[0]
-    meal = st.selectbox("Comida", MEALS, index=MEALS.index(default_meal))
-    st.divider()
+@st.fragment
+def render_pending_card():
+    """
+    Resultado de Calcular + botón Guardar. Como fragment, apretar Guardar
+    rerunea solo este bloque; al terminar pedimos un rerun completo para
+    resetear el formulario.
+    """
+    prot = st.session_state.pending_payload.get("total_proteina", 0)
 
-    # kcal_libres: solo en qty
-    kcal_libres = 0
-    prot_libres = 0
-    
-    if calc_mode == "qty":
-        kcal_libres_default = int(st.session_state.get("prefill_kcal_libres", 0))
-        kcal_libres = st.number_input("Kcal libres", min_value=0, step=1, format="%d", value=kcal_libres_default)
-    
-        prot_libres = st.number_input("Proteína libre (g)", min_value=0, step=1, format="%d", value=0)
-    
+    if st.session_state.edit_log_id is None:
+        st.success(
+            f"{st.session_state.pending_meal.capitalize()} = {round(st.session_state.pending_total)} kcal | "
+            f"{round(prot)} g proteína"
+        )
     else:
-        kcal_libres = 0
-        prot_libres = 0
-
-    prefill_items = st.session_state.get("prefill_items", None)
+        st.warning(
+            f"Editando ID {st.session_state.edit_log_id} — "
+            f"{st.session_state.pending_meal.capitalize()} = {round(st.session_state.pending_total)} kcal | "
+            f"{round(prot)} g proteína"
+        )
 
-    rows_data = []
-    foods_list = [""] + sorted(foods["alimento"].tolist())
+    # cálculo vacío: no hay nada que guardar (ni request a la hoja)
+    if not st.session_state.pending_detail:
+        st.info("No hay alimentos ni kcal libres para guardar.")
+        return
 
-    if prefill_items is not None:
-        st.session_state.rows_count = max(st.session_state.rows_count, len(prefill_items))
+    st.write("Detalle:")
+    for line in st.session_state.pending_detail:
+        st.write("-", line)
 
-    for i in range(st.session_state.rows_count):
-        col1, col2 = st.columns([4, 1])
+    if st.button("Guardar"):
+        # una sola lectura del reloj: fecha y timestamp siempre coinciden
+        now = now_ar()
+        fecha_str = str(now.date())
+        ts_str = str(now)
 
-        default_food = ""
-        default_val = 0
+        meal_str = st.session_state.pending_meal
+        total_str = f"{st.session_state.pending_total:.2f}"
 
-        if prefill_items is not None and i < len(prefill_items):
-            default_food = str(prefill_items[i].get("alimento", "")).strip().lower()
+        detalle_str = "\n".join(st.session_state.pending_detail)
+        kcal_libres_str = str(int(st.session_state.pending_payload.get("kcal_libres", 0)))
+        detalle_json_str = json_dumps(st.session_state.pending_payload)
 
-            # si el item trae calc_mode viejo, intentamos inferir
-            # - si estamos en qty: usar cantidad
-            # - si estamos en kcal: usar kcal_target si existe, si no kcal_actual redondeado
-            if calc_mode == "qty":
-                default_val = int(prefill_items[i].get("cantidad", 0) or 0)
+        if st.session_state.edit_log_id is None:
+            with sheet_values_lock():
+                new_id = next_log_id()
+                new_row = [
+                    new_id,
+                    fecha_str,
+                    ts_str,
+                    meal_str,
+                    total_str,
+                    detalle_str,
+                    kcal_libres_str,
+                    detalle_json_str,
+                ]
+                resp = logs_ws.append_row(new_row, value_input_option="RAW")
+                # la fila nueva va directo a los valores crudos compartidos: todas las
+                # sesiones la ven sin rebajar logs
+                patch_sheet_row("logs", appended_row(resp), new_row)
+                clear_logs_frames()
+            st.success("Guardado ✅")
+        else:
+            target_id = int(st.session_state.edit_log_id)
+            target_row = find_log_row(target_id)
+            if target_row is None:
+                st.error("No encontré la fila para actualizar (ID no existe).")
             else:
-                kt = prefill_items[i].get("kcal_target", None)
-                if kt is None or str(kt).strip() in ("", "None"):
-                    default_val = int(round(float(prefill_items[i].get("kcal_actual", 0) or 0)))
-                else:
-                    default_val = int(kt)
-
-        with col1:
-            alimento = st.selectbox(
-                f"Alimento {i+1}",
-                options=foods_list,
-                index=foods_list.index(default_food) if default_food in foods_list else 0,
-                key=f"food_{st.session_state.form_reset_id}_{i}",
-            )
-        with col2:
-            val = st.number_input(
-                "Cant.",
-                min_value=0,
-                step=1,
-                format="%d",
-                value=None if default_val == 0 else int(default_val),
-                key=f"qty_val_{st.session_state.form_reset_id}_{i}",
-            )
+                # columnas cacheadas al conectar: no hace falta releer la hoja
+                rng = row_range(sheet_cols["logs"], target_row, "fecha", "detalle_json")
+                logs_ws.update(
+                    rng,
+                    [[fecha_str, ts_str, meal_str, total_str, detalle_str, kcal_libres_str, detalle_json_str]],
+                    value_input_option="RAW",
+                )
+                st.success("Actualizado ✅")
 
-        rows_data.append((alimento, int(val) if val is not None else 0))
+            st.session_state.edit_log_id = None
+            clear_logs_cache()
+
+        st.session_state.pending_total = None
+        st.session_state.pending_detail = None
+        st.session_state.pending_payload = None
+        st.session_state.pending_meal = None
 
-    # consumimos el prefill para no “reinyectar” siempre
-    if prefill_items is not None:
+        st.session_state.prefill_meal = MEALS[0]
+        st.session_state.prefill_kcal_libres = 0
         st.session_state.prefill_items = None
 
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        if st.button("➕ Agregar"):
-            st.session_state.rows_count += 1
-            st.rerun()
+        st.session_state.calc_rows = blank_calc_rows()
+        st.session_state.form_reset_id += 1
+
+        st.rerun()
+
+
+# ==================================================
+# CALCULAR
+# ==================================================
+if mode == "Calcular":
+    calc_mode = "qty"
+
+    # foods solo hace falta acá (calc_items_dual usa food_index y los arrays)
+    foods = load_foods_df()
+    food_index, (food_cats, food_kcal_unit, food_prot_unit), foods_list = build_food_lookups(foods)
+
+    # form: los widgets no disparan rerun hasta "Calcular"
+    with st.form("calc", clear_on_submit=False):
+        # meal (si venimos de editar, puede estar precargada)
+        default_meal = st.session_state.get("prefill_meal", MEALS[0])
+        if default_meal not in MEALS:
+            default_meal = MEALS[0]
+        meal = st.selectbox("Comida", MEALS, index=MEALS.index(default_meal))
+        st.divider()
+
+        # kcal_libres: solo en qty
+        kcal_libres = 0
+        prot_libres = 0
+
+        if calc_mode == "qty":
+            kcal_libres_default = int(st.session_state.get("prefill_kcal_libres", 0))
+            kcal_libres = st.number_input("Kcal libres", min_value=0, step=1, format="%d", value=kcal_libres_default)
+
+            prot_libres = st.number_input("Proteína libre (g)", min_value=0, step=1, format="%d", value=0)
 
-    with c2:
-        if st.button("Calcular"):
-            total, detail_lines, payload = calc_items_dual(rows_data, int(kcal_libres), int(prot_libres), calc_mode)
-            st.session_state.pending_total = float(total)
-            st.session_state.pending_detail = detail_lines
-            st.session_state.pending_payload = payload
-            st.session_state.pending_meal = meal
-
-    with c3:
-        if st.session_state.edit_log_id is not None:
-            if st.button("Cancelar edición"):
-                st.session_state.edit_log_id = None
-                st.session_state.pending_total = None
-                st.session_state.pending_detail = None
-                st.session_state.pending_payload = None
-                st.session_state.pending_meal = None
-                st.session_state.prefill_meal = MEALS[0]
-                st.session_state.prefill_kcal_libres = 0
-                st.session_state.prefill_items = None
-                st.session_state.force_calc_mode = "Cantidad → Kcal"
-                st.success("Edición cancelada.")
-                st.rerun()
-    
-    if st.session_state.pending_total is not None:
-        prot = st.session_state.pending_payload.get("total_proteina", 0)
-    
-        if st.session_state.edit_log_id is None:
-            st.success(
-                f"{st.session_state.pending_meal.capitalize()} = {round(st.session_state.pending_total)} kcal | "
-                f"{round(prot)} g proteína"
-            )
         else:
-            st.warning(
-                f"Editando ID {st.session_state.edit_log_id} — "
-                f"{st.session_state.pending_meal.capitalize()} = {round(st.session_state.pending_total)} kcal | "
-                f"{round(prot)} g proteína"
-            )
-    
-        st.write("Detalle:")
-        for line in st.session_state.pending_detail:
-            st.write("-", line)
-
-        if st.button("Guardar"):
-            logs_actual = load_logs_df()
-
-            fecha_str = str(today_ar())
-            ts_str = str(now_ar())
-
-            meal_str = st.session_state.pending_meal
-            total_str = f"{st.session_state.pending_total:.2f}"
-
-            detalle_str = "\n".join(st.session_state.pending_detail)
-            kcal_libres_str = str(int(st.session_state.pending_payload.get("kcal_libres", 0)))
-            detalle_json_str = json.dumps(st.session_state.pending_payload, ensure_ascii=False)
-
-            if st.session_state.edit_log_id is None:
-                new_id = int(logs_actual["id"].max()) + 1 if not logs_actual.empty else 1
-                logs_ws.append_row(
-                    [
-                        new_id,
-                        fecha_str,
-                        ts_str,
-                        meal_str,
-                        total_str,
-                        detalle_str,
-                        kcal_libres_str,
-                        detalle_json_str,
-                    ],
-                    value_input_option="RAW",
-                )
-                st.success("Guardado ✅")
-            else:
-                target_id = int(st.session_state.edit_log_id)
-                target_row = find_row_index_by_id(logs_ws, target_id)
-                if target_row is None:
-                    st.error("No encontré la fila para actualizar (ID no existe).")
+            kcal_libres = 0
+            prot_libres = 0
+
+        prefill_items = st.session_state.get("prefill_items", None)
+
+        if prefill_items is not None:
+            prefill_rows = []
+            for item in prefill_items:
+                default_food = str(item.get("alimento", "")).strip().lower()
+                if default_food not in food_index:
+                    default_food = ""
+
+                # si el item trae calc_mode viejo, intentamos inferir
+                # - si estamos en qty: usar cantidad
+                # - si estamos en kcal: usar kcal_target si existe, si no kcal_actual redondeado
+                if calc_mode == "qty":
+                    default_val = int(item.get("cantidad", 0) or 0)
                 else:
-                    values = logs_ws.get_all_values()
-                    header = [h.strip() for h in values[0]]
-
-                    fecha_col = header.index("fecha") + 1
-                    ts_col = header.index("timestamp") + 1
-                    meal_col = header.index("meal") + 1
-                    total_col = header.index("total_kcal") + 1
-                    detalle_col = header.index("detalle") + 1
-                    kcal_libres_col = header.index("kcal_libres") + 1
-                    detalle_json_col = header.index("detalle_json") + 1
-
-                    start_col = fecha_col
-                    end_col = detalle_json_col
-                    rng = f"{gspread.utils.rowcol_to_a1(target_row, start_col)}:{gspread.utils.rowcol_to_a1(target_row, end_col)}"
-                    logs_ws.update(
-                        rng,
-                        [[fecha_str, ts_str, meal_str, total_str, detalle_str, kcal_libres_str, detalle_json_str]],
-                        value_input_option="RAW",
-                    )
-                    st.success("Actualizado ✅")
+                    kt = item.get("kcal_target", None)
+                    if kt is None or str(kt).strip() in ("", "None"):
+                        default_val = int(round(float(item.get("kcal_actual", 0) or 0)))
+                    else:
+                        default_val = int(kt)
+
+                prefill_rows.append((default_food, default_val))
+
+            prefill_df = pd.DataFrame(prefill_rows, columns=["alimento", "cantidad"])
+            if len(prefill_df) < 4:
+                prefill_df = pd.concat([prefill_df, blank_calc_rows(4 - len(prefill_df))], ignore_index=True)
+            st.session_state.calc_rows = prefill_df
+            # editor nuevo para que tome los datos precargados
+            st.session_state.form_reset_id += 1
+
+            # consumimos el prefill para no “reinyectar” siempre
+            st.session_state.prefill_items = None
+
+        # un solo widget para todas las filas (se agregan filas desde el propio editor)
+        edited = st.data_editor(
+            st.session_state.calc_rows,
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "alimento": st.column_config.SelectboxColumn("Alimento", options=foods_list, width="large"),
+                "cantidad": st.column_config.NumberColumn("Cant.", min_value=0, step=1, format="%d"),
+            },
+            key=f"calc_editor_{st.session_state.form_reset_id}",
+        )
+
+        rows_data = [
+            (
+                alimento if isinstance(alimento, str) else "",
+                int(cantidad) if pd.notna(cantidad) else 0,
+            )
+            for alimento, cantidad in edited.itertuples(index=False, name=None)
+        ]
+
+        submitted = st.form_submit_button("Calcular")
 
-                st.session_state.edit_log_id = None
+    if submitted:
+        total, detail_lines, payload = calc_items_dual(rows_data, int(kcal_libres), int(prot_libres), calc_mode)
+        st.session_state.pending_total = float(total)
+        st.session_state.pending_detail = detail_lines
+        st.session_state.pending_payload = payload
+        st.session_state.pending_meal = meal
 
-            load_logs_df.clear()
-            
+    if st.session_state.edit_log_id is not None:
+        if st.button("Cancelar edición"):
+            st.session_state.edit_log_id = None
             st.session_state.pending_total = None
             st.session_state.pending_detail = None
             st.session_state.pending_payload = None
             st.session_state.pending_meal = None
-            
             st.session_state.prefill_meal = MEALS[0]
             st.session_state.prefill_kcal_libres = 0
             st.session_state.prefill_items = None
-            
-            st.session_state.rows_count = 4
-            st.session_state.form_reset_id += 1
-            
+            st.session_state.force_calc_mode = "Cantidad → Kcal"
+            st.success("Edición cancelada.")
             st.rerun()
 
+    if st.session_state.pending_total is not None:
+        render_pending_card()
+
 # ==================================================
 # AGREGAR ALIMENTO
 # ==================================================
-if mode == "Agregar alimento":
+elif mode == "Agregar alimento":
     nombre = st.text_input(
         "Nombre",
         key=f"nuevo_nombre_{st.session_state.food_form_reset_id}"
@@ -728,45 +1057,57 @@ if mode == "Agregar alimento":
                 st.stop()
 
             foods_now = load_foods_df()
-            existing = foods_now[foods_now["alimento"] == nombre_n]
-
-            values = foods_ws.get_all_values()
-            header = [h.strip() for h in values[0]]
+            # nombre_n ya viene normalizado igual que foods["alimento"]
+            existing_idx = build_food_rows(foods_now).get(nombre_n)
 
+            header = sheet_headers["foods"]
             alimento_col = header.index("alimento") + 1
-            prot_col = header.index("valor_proteina") + 1
 
             kcal_num = valor_f
             proteina_num = proteina_f
 
-            if not existing.empty:
-                target_row = None
+            if existing_idx is not None:
+                # el índice de foods es la posición en la hoja
+                target_row = int(existing_idx) + 2
 
-                for idx, row in enumerate(values[1:], start=2):
-                    if str(row[alimento_col - 1]).strip().lower() == nombre_n:
-                        target_row = idx
-                        break
+                # chequeo barato (una celda) por si la hoja cambió desde que se cacheó foods
+                stale = str(foods_ws.cell(target_row, alimento_col).value or "").strip().lower() != nombre_n
+                if stale:
+                    target_row = None
+                    for idx, row in enumerate(foods_ws.get_all_values()[1:], start=2):
+                        if alimento_col - 1 < len(row) and str(row[alimento_col - 1]).strip().lower() == nombre_n:
+                            target_row = idx
+                            break
 
                 if target_row is None:
                     st.error("No encontré la fila para actualizar.")
                 else:
-                    rng = f"{gspread.utils.rowcol_to_a1(target_row, alimento_col)}:{gspread.utils.rowcol_to_a1(target_row, prot_col)}"
+                    rng = row_range(sheet_cols["foods"], target_row, "alimento", "valor_proteina")
                     foods_ws.update(
                         rng,
                         [[nombre_n, tipo, kcal_num, proteina_num]],
-                        value_input_option="USER_ENTERED",
+                        value_input_option="RAW",
                     )
-                    load_foods_df.clear()
+                    if stale:
+                        # la hoja ya no coincide con el cache: releemos foods entero
+                        # en vez de parchear una fila equivocada
+                        clear_food_caches()
+                    else:
+                        patch_sheet_row(
+                            "foods", target_row, [nombre_n, tipo, kcal_num, proteina_num],
+                            start=alimento_col - 1,
+                        )
+                        clear_foods_frames()
                     st.success("Actualizado ✅")
 
             else:
                 new_id = int(foods_now["id"].max()) + 1 if not foods_now.empty else 1
 
-                foods_ws.append_row(
-                    [new_id, nombre_n, tipo, kcal_num, proteina_num],
-                    value_input_option="USER_ENTERED"
-                )
-                load_foods_df.clear()
+                new_row = [new_id, nombre_n, tipo, kcal_num, proteina_num]
+                resp = foods_ws.append_row(new_row, value_input_option="RAW")
+                # la fila nueva va a los valores crudos compartidos, donde la ubicó el append
+                patch_sheet_row("foods", appended_row(resp), new_row)
+                clear_foods_frames()
                 st.success("Agregado ✅")
 
             st.session_state.food_form_reset_id += 1
@@ -776,7 +1117,7 @@ if mode == "Agregar alimento":
 # ==================================================
 # VER HOY (con eliminar + editar + meta/gym)
 # ==================================================
-if mode == "Ver hoy":
+elif mode == "Ver hoy":
     hoy = str(today_ar())
 
     tipo_actual, meta_current = get_or_create_daily_status(hoy)
@@ -820,53 +1161,73 @@ if mode == "Ver hoy":
         st.rerun()
 
     logs_today = load_logs_df()
-    today_logs = logs_today[logs_today["fecha"] == hoy].copy()
+    # ordenado por id una sola vez: cada comida sale ya en orden al tomar sus posiciones
+    today_logs = rows_for_fecha(logs_today, load_logs_fecha_rows(), hoy).sort_values("id", kind="stable")
 
     st.divider()
     if today_logs.empty:
         st.info("No hay registros hoy.")
         st.write(f"Meta hoy: **{meta_current}** kcal")
     else:
-        resumen = today_logs.groupby("meal")["total_kcal"].sum()
-        total_dia = float(today_logs["total_kcal"].sum())
+        # una pasada por comida: total y posiciones (son pocas filas, un groupby
+        # de pandas cuesta más en armarse que en sumar)
+        resumen = {}
+        meal_pos = {}
+        meals_today = today_logs["meal"].to_numpy()
+        kcal_today = today_logs["total_kcal"].to_numpy()
+        for pos, (m, k) in enumerate(zip(meals_today, kcal_today)):
+            resumen[m] = resumen.get(m, 0.0) + float(k)
+            meal_pos.setdefault(m, []).append(pos)
+
+        total_dia = float(sum(resumen.values()))
         delta = float(total_dia - meta_current)
+
+        # redondeos de pantalla, una sola vez
+        resumen_r = {m: int(round(k)) for m, k in resumen.items()}
+        total_dia_r = int(round(total_dia))
+        delta_r = int(round(delta))
     
         total_prot = 0
     
-        for _, r in today_logs.iterrows():
-            dj = str(r["detalle_json"]).strip()
+        for dj in today_logs["detalle_json"].to_numpy():
+            dj = str(dj).strip()
             if not dj:
                 continue
     
             try:
-                payload = json.loads(dj)
+                payload = json_loads(dj)
                 total_prot += float(payload.get("total_proteina", 0) or 0)
             except:
                 continue
     
         c1, c2, c3, c4 = st.columns(4)
     
-        c1.metric("Kcal", f"{round(total_dia)}")
+        c1.metric("Kcal", f"{total_dia_r}")
         c2.metric("Proteína", f"{round(total_prot)} g")
         c3.metric("Meta", f"{meta_current}")
-        c4.metric("Delta", f"{'+' if delta>0 else ''}{round(delta)}")
+        c4.metric("Delta", f"{'+' if delta>0 else ''}{delta_r}")
     
         st.divider()
 
+        render_cols = ["id", "timestamp", "total_kcal", "detalle", "detalle_json", "meal", "kcal_libres"]
+        render_logs = today_logs[render_cols]
+
         for meal_name in MEALS:
-            sub = today_logs[today_logs["meal"] == meal_name].sort_values("id")
-            if sub.empty:
+            pos = meal_pos.get(meal_name)
+            if pos is None:
                 continue
+            sub = render_logs.iloc[pos]
 
-            st.subheader(f"{meal_name.capitalize()} — {round(float(resumen.loc[meal_name]))} kcal")
+            st.subheader(f"{meal_name.capitalize()} — {resumen_r.get(meal_name, 0)} kcal")
 
-            for _, r in sub.iterrows():
-                log_id = int(r["id"])
-                ts = r["timestamp"]
-                total_k = float(r["total_kcal"])
+            for log_id, ts, total_k, detalle, detalle_json, meal_v, kcal_libres_v in sub.itertuples(
+                index=False, name=None
+            ):
+                log_id = int(log_id)
+                total_k = float(total_k)
 
                 st.caption(f"ID {log_id} · {ts} · {round(total_k)} kcal")
-                st.code(r["detalle"] if str(r["detalle"]).strip() else "(sin detalle)")
+                st.code(detalle if str(detalle).strip() else "(sin detalle)")
 
                 b1, b2 = st.columns(2)
 
@@ -875,7 +1236,7 @@ if mode == "Ver hoy":
 
                         payload = None
                         try:
-                            payload = json.loads(r["detalle_json"]) if str(r["detalle_json"]).strip() else None
+                            payload = json_loads(detalle_json) if str(detalle_json).strip() else None
                         except Exception:
                             payload = None
 
@@ -883,10 +1244,10 @@ if mode == "Ver hoy":
                         st.session_state.pending_total = None
                         st.session_state.pending_detail = None
                         st.session_state.pending_payload = None
-                        st.session_state.pending_meal = r["meal"]
+                        st.session_state.pending_meal = meal_v
 
-                        st.session_state.prefill_meal = r["meal"]
-                        st.session_state.prefill_kcal_libres = int(r.get("kcal_libres", 0))
+                        st.session_state.prefill_meal = meal_v
+                        st.session_state.prefill_kcal_libres = int(kcal_libres_v)
 
                         if payload and isinstance(payload, dict) and isinstance(payload.get("items", []), list):
                             st.session_state.prefill_items = payload["items"]
@@ -899,19 +1260,19 @@ if mode == "Ver hoy":
 
                 with b2:
                     if st.button("🗑️ Eliminar", key=f"del_{log_id}"):
-                        target_row = find_row_index_by_id(logs_ws, log_id)
+                        target_row = find_log_row(log_id)
                         if target_row is None:
                             st.error("No encontré la fila para borrar.")
                         else:
                             logs_ws.delete_rows(target_row)
-                            load_logs_df.clear()
+                            clear_logs_cache()
                             st.success(f"ID {log_id} eliminado ✅")
                             st.rerun()
 
                 st.divider()
 
-        st.subheader(f"Total del día: {round(total_dia)} kcal")
-        st.write(f"Delta vs meta: **{'+' if delta>0 else ''}{round(delta)} kcal**")
+        st.subheader(f"Total del día: {total_dia_r} kcal")
+        st.write(f"Delta vs meta: **{'+' if delta>0 else ''}{delta_r} kcal**")
         prot_obj = 130
         prot_delta = total_prot - prot_obj
         